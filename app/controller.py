@@ -8,7 +8,7 @@ controller expects (intent, slots, plan, natural_response).
 """
 
 from typing import Dict, Any, List
-from app import llm_client, tools, recommender
+from app import llm_client, tools, recommender, profiler
 
 # Allowed actions that the controller may execute
 ALLOWED_ACTIONS = {
@@ -94,9 +94,26 @@ def execute_plan(plan: List[Dict[str, Any]], slots: Dict[str, Any]) -> Dict[str,
 def handle_message(user_text: str, session_context: Dict[str, Any] = None) -> Dict[str, Any]:
     """Primary entrypoint for the Streamlit app.
 
+    Set `session_context["profile"]` (or GOODFOODS_PROFILE_RATE) to profile
+    the turn; the summary is added as `debug["profile"]`.
+
     Returns:
       {"success": bool, "reply": str, "debug": {...}}
     """
+    if not profiler.should_profile(session_context):
+        return _handle_message(user_text, session_context)
+    res, prof = profiler.profile_call(
+        _handle_message, user_text, session_context, write_file=profiler.requested(session_context)
+    )
+    debug = res.get("debug")
+    if isinstance(debug, dict):
+        debug["profile"] = prof
+    else:
+        res["debug"] = {"profile": prof}
+    return res
+
+
+def _handle_message(user_text: str, session_context: Dict[str, Any] = None) -> Dict[str, Any]:
     try:
         # Parse with mock or real LLM function
         parser = getattr(llm_client, "mock_parse_intent", None) or getattr(llm_client, "parse_intent")
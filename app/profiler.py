@@ -0,0 +1,166 @@
+"""Opt-in per-request profiler for `controller.handle_message`.
+
+A turn is profiled when `session_context["profile"]` is truthy or when it is
+picked by the `GOODFOODS_PROFILE_RATE` sampling rate (0.0-1.0, default 0).
+Profiled turns record every Python and C call (so sqlite3 cursor calls show
+up), tagged with the caller's line, and return a top-N summary of hot
+functions and hot call-site lines for the `debug` payload. Only turns that
+explicitly request profiling also write a collapsed-stack file (usable by
+flamegraph.pl / speedscope / inferno) into `GOODFOODS_PROFILE_DIR`; sampled
+turns return just the summary so production disks don't fill up. When
+neither switch is on the wrapped call runs directly.
+"""
+
+import os
+import sys
+import time
+import uuid
+import random
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+PROFILE_DIR = os.environ.get("GOODFOODS_PROFILE_DIR") or os.path.join(ROOT, "profiles")
+TOP_N = 15
+
+try:
+    SAMPLE_RATE = float(os.environ.get("GOODFOODS_PROFILE_RATE", "0") or 0)
+except ValueError:
+    SAMPLE_RATE = 0.0
+
+
+def requested(session_context: Optional[Dict[str, Any]]) -> bool:
+    return bool(session_context and session_context.get("profile"))
+
+
+def should_profile(session_context: Optional[Dict[str, Any]]) -> bool:
+    if requested(session_context):
+        return True
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+def _builtin_label(fn) -> str:
+    owner = getattr(fn, "__self__", None)
+    if owner is not None and not isinstance(owner, type(sys)):
+        return f"<{type(owner).__name__}.{fn.__name__}>"
+    return f"<{getattr(fn, '__module__', None) or 'builtins'}.{fn.__name__}>"
+
+
+class _StackRecorder:
+    """sys.setprofile hook that attributes wall time to full call stacks.
+
+    Each stack entry is `[label, line]`, where `line` is the line in that
+    frame that made the call to the entry above it (None for the leaf), so a
+    hot callee can be traced back to the line of its caller.
+    """
+
+    def __init__(self):
+        self.stack: List[List[Any]] = []
+        self.collapsed: Dict[Tuple[Tuple[str, Optional[int]], ...], float] = {}
+        self.calls: Dict[str, int] = {}
+        self.last = time.perf_counter()
+
+    def _flush(self):
+        now = time.perf_counter()
+        if self.stack:
+            key = tuple((label, line) for label, line in self.stack)
+            self.collapsed[key] = self.collapsed.get(key, 0.0) + (now - self.last)
+        self.last = now
+
+    def __call__(self, frame, event, arg):
+        if event == "call" or event == "c_call":
+            self._flush()
+            if event == "call":
+                label = _frame_label(frame)
+                caller = frame.f_back
+                line = caller.f_lineno if caller is not None else None
+            else:
+                label = _builtin_label(arg)
+                line = frame.f_lineno
+            if self.stack:
+                self.stack[-1][1] = line
+            self.stack.append([label, None])
+            self.calls[label] = self.calls.get(label, 0) + 1
+        elif event in ("return", "c_return", "c_exception"):
+            self._flush()
+            if self.stack:
+                self.stack.pop()
+            if self.stack:
+                self.stack[-1][1] = None
+
+
+def _entry_label(label: str, line: Optional[int]) -> str:
+    return f"{label}:L{line}" if line is not None else label
+
+
+def _summarize(rec: _StackRecorder, top_n: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Return (hot functions by self time, hot call-site lines by cumulative time)."""
+    self_time: Dict[str, float] = {}
+    cum_time: Dict[str, float] = {}
+    line_time: Dict[str, float] = {}
+    for stack, secs in rec.collapsed.items():
+        leaf = stack[-1][0]
+        self_time[leaf] = self_time.get(leaf, 0.0) + secs
+        for label in {label for label, _ in stack}:
+            cum_time[label] = cum_time.get(label, 0.0) + secs
+        for site in {_entry_label(label, line) for label, line in stack if line is not None}:
+            line_time[site] = line_time.get(site, 0.0) + secs
+    ranked = sorted(self_time.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+    top = [
+        {
+            "function": label,
+            "self_ms": round(secs * 1000, 3),
+            "cumulative_ms": round(cum_time.get(label, 0.0) * 1000, 3),
+            "calls": rec.calls.get(label, 0),
+        }
+        for label, secs in ranked
+    ]
+    ranked_lines = sorted(line_time.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+    top_lines = [{"line": site, "cumulative_ms": round(secs * 1000, 3)} for site, secs in ranked_lines]
+    return top, top_lines
+
+
+def _write_collapsed(rec: _StackRecorder, out_dir: str) -> Optional[str]:
+    """Write `frame;frame;frame <microseconds>` lines. Returns path or None."""
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.collapsed"
+        path = os.path.join(out_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, secs in rec.collapsed.items():
+                us = int(secs * 1_000_000)
+                if us > 0:
+                    f.write(";".join(_entry_label(label, line) for label, line in stack) + f" {us}\n")
+        return path
+    except OSError:
+        return None
+
+
+def profile_call(fn: Callable[..., Any], *args, write_file: bool = True, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """Run `fn` under the stack recorder; returns (result, profile_summary).
+
+    `collapsed_path` in the summary is None when `write_file` is False.
+    """
+    rec = _StackRecorder()
+    prev = sys.getprofile()
+    start = time.perf_counter()
+    rec.last = start
+    sys.setprofile(rec)
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        sys.setprofile(prev)
+    total = time.perf_counter() - start
+    top, top_lines = _summarize(rec, TOP_N)
+    summary = {
+        "total_ms": round(total * 1000, 3),
+        "collapsed_path": _write_collapsed(rec, PROFILE_DIR) if write_file else None,
+        "top": top,
+        "top_lines": top_lines,
+    }
+    return result, summary
@@ -3,8 +3,14 @@ import os, json
 import importlib
 import importlib.util
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+# Number of most recent messages rendered in the main chat area; older ones
+# are paginated in an expander so reruns stay cheap as history grows.
+HISTORY_WINDOW = 20
+HISTORY_PAGE_SIZE = 20
 
 
 def _load_handle_message():
@@ -34,7 +40,31 @@ def _load_handle_message():
         raise ImportError("Could not import `handle_message` from controller module") from e
 
 
-handle_message = _load_handle_message()
+# show_spinner=False: the spinner emits an element, and this runs before
+# st.set_page_config, which must be the first Streamlit command.
+@st.cache_resource(show_spinner=False)
+def _warm_backend():
+    """Import the controller, create the schema and seed the DB connection
+    pool and catalog cache once per server process."""
+    fn = _load_handle_message()
+    tools = importlib.import_module("app.tools")
+    with tools._db_conn():
+        pass
+    tools.load_restaurants()
+    return fn
+
+
+@st.cache_data
+def _load_catalog():
+    """Parse the seed file once; returns None when it is missing."""
+    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "restaurants_seed.json")
+    if not os.path.exists(data_path):
+        return None
+    with open(data_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+handle_message = _warm_backend()
 
 st.set_page_config(page_title="GoodFoods Reservation Agent", layout="wide")
 
@@ -45,16 +75,17 @@ if "history" not in st.session_state:
     st.session_state.history = []
 
 
-def _safe_handle(msg: str) -> Dict[str, Any]:
+def _safe_handle(msg: str, session_context: Dict[str, Any] = None) -> Dict[str, Any]:
     try:
-        return handle_message(msg)
+        return handle_message(msg, session_context)
     except Exception as e:
         return {"success": False, "reply": "Internal error processing request.", "debug": {"error": str(e)}}
 
 
 def send_user_message(msg: str):
     st.session_state.history.append({"role": "user", "text": msg})
-    res = _safe_handle(msg)
+    ctx = {"profile": True} if st.session_state.get("profile_requests") else None
+    res = _safe_handle(msg, ctx)
     st.session_state.history.append({"role": "agent", "text": res.get("reply")})
     st.session_state.debug = res.get("debug")
 
@@ -66,16 +97,33 @@ with st.form("message_form", clear_on_submit=True):
         send_user_message(user_msg)
 
 
-# display chat area
-for item in st.session_state.history:
-    if item.get("role") == "user":
-        st.markdown(f"**You:** {item.get('text')}")
-    else:
-        st.markdown(f"**Agent:** {item.get('text')}")
+def _render_turns(items: List[Dict[str, Any]]):
+    for item in items:
+        role = "user" if item.get("role") == "user" else "assistant"
+        with st.chat_message(role):
+            st.markdown(item.get("text") or "")
+
+
+# display chat area: older turns paginated, only the recent window inline
+history = st.session_state.history
+older = history[:-HISTORY_WINDOW] if len(history) > HISTORY_WINDOW else []
+if older:
+    pages = (len(older) + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    with st.expander(f"Earlier messages ({len(older)})"):
+        # no max_value: it changes as history grows, which would reset the
+        # widget; clamp the stored page instead
+        if st.session_state.get("history_page", pages) > pages:
+            st.session_state.history_page = pages
+        st.session_state.setdefault("history_page", pages)
+        page = int(st.number_input("Page", min_value=1, step=1, key="history_page"))
+        page = min(page, pages)
+        _render_turns(older[(page - 1) * HISTORY_PAGE_SIZE : page * HISTORY_PAGE_SIZE])
+_render_turns(history[-HISTORY_WINDOW:])
 
 
 with st.sidebar:
     st.header("Controls")
+    st.checkbox("Profile requests", key="profile_requests", help="Adds a per-turn profile to the debug payload.")
     if st.button("Load sample queries"):
         samples = [
             "Book a table for 4 in Koramangala tomorrow at 19:00",
@@ -83,18 +131,21 @@ with st.sidebar:
             "I want to cancel booking 1234",
             "Change my booking 9c8a7b to 20:00",
         ]
-        for s in samples:
+        # run the turns concurrently (each checks out its own pooled DB
+        # connection; bookings are atomic via BEGIN IMMEDIATE), then append
+        # them in order
+        ctx = {"profile": True} if st.session_state.get("profile_requests") else None
+        with ThreadPoolExecutor(max_workers=len(samples)) as pool:
+            results = list(pool.map(lambda s: _safe_handle(s, ctx), samples))
+        for s, res in zip(samples, results):
             st.session_state.history.append({"role": "user", "text": s})
-            res = _safe_handle(s)
             st.session_state.history.append({"role": "agent", "text": res.get("reply")})
 
     st.markdown("---")
     st.header("Dataset")
     try:
-        data_path = os.path.join(os.path.dirname(__file__), "..", "data", "restaurants_seed.json")
-        if os.path.exists(data_path):
-            with open(data_path, "r", encoding="utf-8") as f:
-                restaurants = json.load(f)
+        restaurants = _load_catalog()
+        if restaurants is not None:
             st.write(f"Loaded {len(restaurants)} restaurants from seed file.")
             if st.checkbox("Show sample restaurants"):
                 for r in restaurants[:6]:
@@ -4,8 +4,11 @@ exposes a small set of functions the controller may call.
 
 import os
 import uuid
+import queue
 import sqlite3
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Iterator
 from app.utils import load_json, now_iso, ensure_db
 
 
@@ -13,11 +16,19 @@ ROOT = os.path.dirname(os.path.dirname(__file__))
 DATA_PATH = os.path.join(ROOT, "data", "restaurants_seed.json")
 DB_PATH = os.path.join(ROOT, "db", "reservations.db")
 
+# Process-wide pool of idle connections. Any thread (Streamlit reruns,
+# sample-query workers) checks one out for the duration of a tool call; up to
+# _POOL_SIZE idle connections are kept, extras are closed on release.
+_POOL_SIZE = 8
+_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
 
-def _ensure_db_conn() -> sqlite3.Connection:
+
+def _open_db_conn() -> sqlite3.Connection:
     ensure_db(DB_PATH)
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10)
     cur = conn.cursor()
+    # WAL lets readers proceed while a booking transaction holds the write lock
+    cur.execute("PRAGMA journal_mode=WAL")
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS reservations (
@@ -37,7 +48,26 @@ def _ensure_db_conn() -> sqlite3.Connection:
     return conn
 
 
+@contextmanager
+def _db_conn() -> Iterator[sqlite3.Connection]:
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _open_db_conn()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        if _pool.qsize() < _POOL_SIZE:
+            _pool.put(conn)
+        else:
+            conn.close()
+
+
+@lru_cache(maxsize=1)
 def load_restaurants() -> List[Dict[str, Any]]:
+    """Seed catalog, parsed once per process. Callers must not mutate it."""
     data = load_json(DATA_PATH)
     if data:
         return data
@@ -56,6 +86,11 @@ def load_restaurants() -> List[Dict[str, Any]]:
     ]
 
 
+@lru_cache(maxsize=1)
+def _restaurants_by_id() -> Dict[str, Dict[str, Any]]:
+    return {str(r.get("id")): r for r in load_restaurants()}
+
+
 def search_locations(area: str = "", party_size: int = 2, vibe: str = "", limit: int = 3) -> List[Dict[str, Any]]:
     restaurants = load_restaurants()
     area_lower = (area or "").strip().lower()
@@ -73,65 +108,75 @@ def search_locations(area: str = "", party_size: int = 2, vibe: str = "", limit:
     return results[: int(limit or 3)]
 
 
-def check_availability(restaurant_id: str, datetime_iso: str, party_size: int) -> Dict[str, Any]:
-    conn = _ensure_db_conn()
-    cur = conn.cursor()
+def _capacity(restaurant_id: str) -> int:
+    r = _restaurants_by_id().get(str(restaurant_id))
+    return int(r.get("capacity", 0) or 0) if r else 0
+
+
+def _availability(cur: sqlite3.Cursor, restaurant_id: str, datetime_iso: str, party_size: int) -> Dict[str, Any]:
     cur.execute(
         "SELECT SUM(party_size) FROM reservations WHERE restaurant_id=? AND datetime=? AND status='CONFIRMED'",
         (restaurant_id, datetime_iso),
     )
     row = cur.fetchone()
     used = int(row[0] or 0)
-    restaurants = load_restaurants()
-    r = next((x for x in restaurants if str(x.get("id")) == str(restaurant_id)), None)
-    capacity = int(r.get("capacity", 0) or 0) if r else 0
+    capacity = _capacity(restaurant_id)
     available = (used + int(party_size or 0)) <= capacity
     return {"restaurant_id": restaurant_id, "available": available, "used": used, "capacity": capacity}
 
 
+def check_availability(restaurant_id: str, datetime_iso: str, party_size: int) -> Dict[str, Any]:
+    with _db_conn() as conn:
+        return _availability(conn.cursor(), restaurant_id, datetime_iso, party_size)
+
+
 def create_reservation(restaurant_id: str, restaurant_name: str, datetime_iso: str, party_size: int, name: str, contact: str) -> Dict[str, Any]:
-    conn = _ensure_db_conn()
-    cur = conn.cursor()
-    av = check_availability(restaurant_id, datetime_iso, party_size)
-    if not av.get("available"):
-        return {"success": False, "reason": "NO_AVAILABILITY", "used": av.get("used"), "capacity": av.get("capacity")}
-    rid = str(uuid.uuid4())[:8]
-    created_at = now_iso()
-    cur.execute(
-        "INSERT INTO reservations (id, restaurant_id, restaurant_name, datetime, party_size, name, contact, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-        (rid, restaurant_id, restaurant_name, datetime_iso, int(party_size or 0), name or "Guest", contact or "N/A", "CONFIRMED", created_at),
-    )
-    conn.commit()
+    with _db_conn() as conn:
+        cur = conn.cursor()
+        # BEGIN IMMEDIATE takes the write lock up front so the availability
+        # check and the insert cannot interleave with another booking.
+        cur.execute("BEGIN IMMEDIATE")
+        av = _availability(cur, restaurant_id, datetime_iso, party_size)
+        if not av.get("available"):
+            return {"success": False, "reason": "NO_AVAILABILITY", "used": av.get("used"), "capacity": av.get("capacity")}
+        rid = str(uuid.uuid4())[:8]
+        created_at = now_iso()
+        cur.execute(
+            "INSERT INTO reservations (id, restaurant_id, restaurant_name, datetime, party_size, name, contact, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (rid, restaurant_id, restaurant_name, datetime_iso, int(party_size or 0), name or "Guest", contact or "N/A", "CONFIRMED", created_at),
+        )
+        conn.commit()
     return {"success": True, "id": rid, "restaurant_name": restaurant_name, "datetime": datetime_iso, "party_size": party_size, "contact": contact}
 
 
 def modify_reservation(booking_id: str, new_datetime: Optional[str] = None, new_party_size: Optional[int] = None) -> Dict[str, Any]:
-    conn = _ensure_db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT restaurant_id, restaurant_name, datetime, party_size FROM reservations WHERE id=? AND status='CONFIRMED'", (booking_id,))
-    row = cur.fetchone()
-    if not row:
-        return {"success": False, "reason": "NOT_FOUND"}
-    restaurant_id, restaurant_name, old_datetime, old_party = row
-    ndt = new_datetime or old_datetime
-    nps = int(new_party_size or old_party)
-    av = check_availability(restaurant_id, ndt, nps)
-    if not av.get("available"):
-        return {"success": False, "reason": "NO_AVAILABILITY"}
-    cur.execute("UPDATE reservations SET datetime=?, party_size=? WHERE id=?", (ndt, nps, booking_id))
-    conn.commit()
+    with _db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("SELECT restaurant_id, restaurant_name, datetime, party_size FROM reservations WHERE id=? AND status='CONFIRMED'", (booking_id,))
+        row = cur.fetchone()
+        if not row:
+            return {"success": False, "reason": "NOT_FOUND"}
+        restaurant_id, restaurant_name, old_datetime, old_party = row
+        ndt = new_datetime or old_datetime
+        nps = int(new_party_size or old_party)
+        av = _availability(cur, restaurant_id, ndt, nps)
+        if not av.get("available"):
+            return {"success": False, "reason": "NO_AVAILABILITY"}
+        cur.execute("UPDATE reservations SET datetime=?, party_size=? WHERE id=?", (ndt, nps, booking_id))
+        conn.commit()
     return {"success": True, "id": booking_id, "restaurant_name": restaurant_name, "datetime": ndt, "party_size": nps}
 
 
 def cancel_reservation(booking_id: str) -> Dict[str, Any]:
-    conn = _ensure_db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT status FROM reservations WHERE id=?", (booking_id,))
-    row = cur.fetchone()
-    if not row:
-        return {"success": False, "reason": "NOT_FOUND"}
-    cur.execute("UPDATE reservations SET status='CANCELLED' WHERE id=?", (booking_id,))
-    conn.commit()
+    with _db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT status FROM reservations WHERE id=?", (booking_id,))
+        row = cur.fetchone()
+        if not row:
+            return {"success": False, "reason": "NOT_FOUND"}
+        cur.execute("UPDATE reservations SET status='CANCELLED' WHERE id=?", (booking_id,))
+        conn.commit()
     return {"success": True, "id": booking_id, "status": "CANCELLED"}
 
 
@@ -0,0 +1,5 @@
+import sys, pathlib
+
+proj = pathlib.Path(__file__).resolve().parents[1]
+if str(proj) not in sys.path:
+    sys.path.insert(0, str(proj))
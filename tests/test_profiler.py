@@ -0,0 +1,105 @@
+import re
+import time
+
+from app import controller, profiler
+
+
+def _leaf():
+    time.sleep(0.02)
+
+
+def _mid():
+    _leaf()
+
+
+def _outer():
+    _mid()
+    return "done"
+
+
+def _swallows_c_exception():
+    try:
+        divmod(1, 0)
+    except ZeroDivisionError:
+        pass
+    time.sleep(0.005)
+
+
+def _by_suffix(entries, suffix):
+    return next(e for e in entries if e["function"].endswith(suffix))
+
+
+def test_should_profile_off_by_default(monkeypatch):
+    monkeypatch.setattr(profiler, "SAMPLE_RATE", 0.0)
+    assert profiler.should_profile(None) is False
+    assert profiler.should_profile({}) is False
+    assert profiler.should_profile({"profile": True}) is True
+
+
+def test_profile_call_attributes_self_and_cumulative_time(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    result, summary = profiler.profile_call(_outer)
+
+    assert result == "done"
+    top = summary["top"]
+    assert top[0]["function"] == "<time.sleep>"
+    outer = _by_suffix(top, ":_outer:" + str(_outer.__code__.co_firstlineno))
+    mid = _by_suffix(top, ":_mid:" + str(_mid.__code__.co_firstlineno))
+    leaf = _by_suffix(top, ":_leaf:" + str(_leaf.__code__.co_firstlineno))
+    assert outer["cumulative_ms"] >= mid["cumulative_ms"] >= leaf["cumulative_ms"] >= 15
+    assert leaf["self_ms"] < leaf["cumulative_ms"]
+    assert outer["calls"] == mid["calls"] == leaf["calls"] == 1
+
+    # the call site of time.sleep inside _leaf is reported as a hot line
+    sleep_line = _leaf.__code__.co_firstlineno + 1
+    assert any(e["line"].endswith(f":_leaf:{_leaf.__code__.co_firstlineno}:L{sleep_line}") for e in summary["top_lines"])
+
+
+def test_collapsed_file_format(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    _, summary = profiler.profile_call(_outer)
+
+    path = summary["collapsed_path"]
+    assert path is not None and path.startswith(str(tmp_path))
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert lines
+    for line in lines:
+        assert re.fullmatch(r"[^ ;]+(;[^ ;]+)* \d+", line), line
+    assert any(re.search(r":_leaf:\d+:L\d+;<time\.sleep> \d+$", line) for line in lines)
+
+
+def test_c_exception_keeps_stack_balanced(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    _, summary = profiler.profile_call(_swallows_c_exception, write_file=False)
+
+    assert summary["collapsed_path"] is None
+    assert summary["top"][0]["function"] == "<time.sleep>"
+    # time.sleep must not be recorded as nested under the failed divmod() call
+    sleep = _by_suffix(summary["top"], "<time.sleep>")
+    failed = _by_suffix(summary["top"], "<builtins.divmod>")
+    assert failed["calls"] == 1
+    assert failed["cumulative_ms"] < sleep["self_ms"]
+
+
+def test_handle_message_profile_flag_writes_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiler, "SAMPLE_RATE", 0.0)
+
+    res = controller.handle_message("Recommend a place in Indiranagar", {"profile": True})
+    prof = res["debug"]["profile"]
+    assert res["success"] is True
+    assert "tool_results" in res["debug"]
+    assert prof["collapsed_path"] is not None
+    assert prof["top"] and prof["top_lines"]
+
+    res = controller.handle_message("Recommend a place in Indiranagar")
+    assert "profile" not in res["debug"]
+
+
+def test_handle_message_sampled_turn_returns_summary_only(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiler, "SAMPLE_RATE", 1.0)
+
+    res = controller.handle_message("Recommend a place in Indiranagar")
+    assert res["debug"]["profile"]["collapsed_path"] is None
+    assert list(tmp_path.iterdir()) == []